@@ -1,3 +1,5 @@
+import os
+
 from codicefiscale.metadata import (
     __author__,
     __copyright__,
@@ -7,6 +9,18 @@ from codicefiscale.metadata import (
     __version__,
 )
 
+# Package resource directories, resolved once (None when not shipped)
+_PKG_DIR = os.path.dirname(__file__)
+
+
+def _resource_dir(name: str) -> str | None:
+    path = os.path.join(_PKG_DIR, name)
+    return path if os.path.isdir(path) else None
+
+
+_TEMPLATES_DIR: str | None = _resource_dir("templates")
+_STATIC_DIR: str | None = _resource_dir("static")
+
 __all__ = [
     "__author__",
     "__copyright__",
@@ -5,15 +5,41 @@ Entry point for running the FastAPI validation server.
 
 if __name__ == "__main__":
     try:
+        import copy
+        import os
+
         import uvicorn
+        from uvicorn.config import LOGGING_CONFIG
+
+        from codicefiscale.app import app  # noqa: F401
 
-        from codicefiscale.app import app
+        port = int(os.getenv("PORT", "8000"))
+        workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+        # Auto-reload is for local development only and excludes workers
+        dev = os.getenv("DEV") == "1"
 
         print("Starting Italian Fiscal Code and VAT Number Validation API server...")
-        print("API Documentation available at: http://localhost:8000/docs")
-        print("Health check available at: http://localhost:8000/health")
+        print(f"API Documentation available at: http://localhost:{port}/docs")
+        print(f"Health check available at: http://localhost:{port}/health")
+
+        # Workers run in their own processes, so the app logs are set up
+        # through uvicorn (which applies log_config in each of them)
+        log_config = copy.deepcopy(LOGGING_CONFIG)
+        log_config["loggers"]["codicefiscale"] = {
+            "handlers": ["default"],
+            "level": "INFO",
+        }
 
-        uvicorn.run("codicefiscale.app:app", host="0.0.0.0", port=8000, reload=True)
+        # uvicorn picks uvloop and httptools when installed (uvicorn[standard])
+        uvicorn.run(
+            "codicefiscale.app:app",
+            host="0.0.0.0",
+            port=port,
+            workers=None if dev else workers,
+            reload=dev,
+            access_log=False,
+            log_config=log_config,
+        )
     except ImportError:
         print("ERROR: FastAPI dependencies not installed.")
         print("Install with: pip install 'python-codicefiscale[api]'")
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import os
+
+
+def get_non_empty_env(key: str) -> str | None:
+    """Get an environment variable, treating blank values as unset."""
+    value = os.getenv(key)
+    return value.strip() if value and value.strip() else None
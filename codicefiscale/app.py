@@ -6,115 +6,268 @@ This module creates a FastAPI app that works in both development and cloud envir
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import logging
 import os
-from typing import Any
+from contextlib import asynccontextmanager, suppress
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Annotated, Any
 
 # Check if we're running in a cloud environment
 IS_CLOUD_DEPLOYMENT = os.getenv('GOOGLE_CLOUD_FUNCTION', '').lower() == '1'
 
+# Longest fiscal code / VAT number input accepted, spaces included
+CODE_MAX_LENGTH = 32
+
+# Longest name, birthdate or birthplace accepted when encoding a fiscal code
+TEXT_MAX_LENGTH = 100
+
+# Most codes accepted by a single batch validation request
+BATCH_MAX_SIZE = 10000
+
+# Number of fiscal codes / VAT numbers whose validation results are memoized
+CACHE_SIZE = 65536
+
+# Number of decoded fiscal codes memoized, each one holds all of its omocodes
+# and its birthplace data (about 10 KB), so far fewer are kept
+DECODE_CACHE_SIZE = 256
+
+# Media type clients send in the Accept header to get msgpack responses
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+# Responses smaller than this (in bytes) are not worth compressing
+GZIP_MINIMUM_SIZE = 500
+
 try:
-    from contextlib import asynccontextmanager
+    import orjson
     from dotenv import load_dotenv
-    from fastapi import Depends, FastAPI, HTTPException, Request
-    from fastapi.responses import JSONResponse, HTMLResponse
-    from fastapi.staticfiles import StaticFiles
-    from fastapi.templating import Jinja2Templates
-    from pydantic import BaseModel, Field
-    
-    # Only load .env in local development, not in cloud deployments
-    if not IS_CLOUD_DEPLOYMENT:
-        load_dotenv()
-        
+    from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, Response
+    from fastapi.middleware.gzip import GZipMiddleware
+    from fastapi.responses import HTMLResponse, JSONResponse
+    from pydantic import BaseModel, Field, StringConstraints
 except ImportError as e:
     raise ImportError(
         "FastAPI dependencies not installed. "
         "Install with: pip install 'python-codicefiscale[api]'"
     ) from e
 
-from . import codicefiscale, partitaiva
+# Only load .env in local development, not in cloud deployments
+if not IS_CLOUD_DEPLOYMENT:
+    load_dotenv()
+
+try:
+    # Optional, decoded data is served as msgpack to clients asking for it
+    import ormsgpack
+
+    _HAS_MSGPACK = True
+except ImportError:
+    _HAS_MSGPACK = False
+
+from . import _STATIC_DIR, _TEMPLATES_DIR, codicefiscale, partitaiva
+from ._env import get_non_empty_env
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from fastapi.templating import Jinja2Templates
+
+    from .auth import ClerkAuth
+
+logger = logging.getLogger(__name__)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class StaticJSON:
+    """JSON body serialized once and served with an ETag."""
+
+    def __init__(self, content: Any) -> None:
+        self.body = orjson.dumps(content)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()}"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Check an If-None-Match header (weak comparison, lists and "*" allowed)."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag}
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def _accepts_msgpack(accept: str) -> bool:
+    """Check if an Accept header asks for msgpack (with a non-zero quality)."""
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        if media_type.strip().lower() != MSGPACK_MEDIA_TYPE:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _decoded_response(http_request: Request, content: dict[str, Any]) -> Response:
+    """Serialize decoded data as msgpack if the client accepts it, as JSON otherwise."""
+    # The body depends on the Accept header, caches must keep them apart
+    headers = {"Vary": "Accept"}
+    if _HAS_MSGPACK and _accepts_msgpack(http_request.headers.get("accept", "")):
+        return Response(
+            ormsgpack.packb(content), media_type=MSGPACK_MEDIA_TYPE, headers=headers
+        )
+    return ORJSONResponse(content, headers=headers)
+
+
+# The same codes are validated over and over (form retries, duplicate
+# submissions), so the pure library calls are memoized (partitaiva already
+# memoizes its own). Decoded data is returned as a read-only mapping to keep
+# the cached results intact.
+_cf_is_valid = functools.lru_cache(maxsize=CACHE_SIZE)(codicefiscale.is_valid)
+
+
+@functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _cf_decode(code: str) -> Mapping[str, Any]:
+    return MappingProxyType(codicefiscale.decode(code))
+
+
+def _cf_is_omocode(code: str) -> bool:
+    """Whether a valid fiscal code, as sent, is one of its own omocodes."""
+    # Omocodes only swap digits for letters at fixed positions, so there is
+    # no need to decode the code again and list all of them
+    return (
+        code.isascii()
+        and code.isupper()
+        and codicefiscale.CODICEFISCALE_RE.fullmatch(code) is not None
+        and any(code[i].isalpha() for i in codicefiscale._OMOCODIA_SUBS_INDEXES)
+    )
 
-# Import authentication only if enabled (check both env var names)
-def _get_non_empty_env(key: str) -> str | None:
-    value = os.getenv(key)
-    return value if value and value.strip() else None
 
+# Import authentication only if enabled (check both env var names)
 AUTH_ENABLED = (
-    _get_non_empty_env("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY") is not None
-    or _get_non_empty_env("CLERK_PUBLISHABLE_KEY") is not None
-)
+    get_non_empty_env("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY")
+    or get_non_empty_env("CLERK_PUBLISHABLE_KEY")
+) is not None
+clerk: ClerkAuth | None = None
 if AUTH_ENABLED:
-    try:
-        from .auth import clerk_auth, get_user_metadata, optional_clerk_auth
-    except (ImportError, ValueError):
-        AUTH_ENABLED = False
+    with suppress(ImportError, ValueError):
+        from .auth import clerk
+    AUTH_ENABLED = clerk is not None
 
-# Build description based on environment
-description = "REST API for validating Italian fiscal codes (Codice Fiscale) and VAT numbers (Partita IVA)"
-if AUTH_ENABLED:
-    description += "\n\n**Authentication**: This API uses Clerk authentication. Include your Bearer token in the Authorization header."
 
-if IS_CLOUD_DEPLOYMENT:
-    description += "\n\n**Deployed on**: Google Cloud Run"
+def _get_user(request: Request, auth_data: dict[str, Any]) -> dict[str, Any] | None:
+    """Metadata of the authenticated user, None for anonymous requests."""
+    # Resolved once by create_app(), None when authentication is disabled
+    get_user_metadata = request.app.state.get_user_metadata
+    if get_user_metadata is None or "sub" not in auth_data:
+        return None
+    user: dict[str, Any] = get_user_metadata(auth_data)
+    return user
+
 
 # Application lifespan handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
-    if IS_CLOUD_DEPLOYMENT:
-        print(f"🚀 Starting Italian Fiscal Code API on Google Cloud Run")
-        print(f"📊 Authentication: {'Enabled' if AUTH_ENABLED else 'Disabled'}")
-    else:
-        print(f"🚀 Starting Italian Fiscal Code API in development mode")
+    # Warm up the decoding path (date parser, slugify) before the first request
+    codicefiscale.is_valid("CCCFBA85D03L219P")
+
+    # Fetch the Clerk JWKS now and keep it fresh, instead of on first request
+    jwks_refresh_task = None
+    if app.state.clerk is not None:
+        from .auth import refresh_signing_keys_periodically
+
+        jwks_refresh_task = asyncio.create_task(
+            refresh_signing_keys_periodically(app.state.clerk)
+        )
+
+    logger.info(
+        "🚀 Starting Italian Fiscal Code API %s (authentication: %s)",
+        "on Google Cloud Run" if IS_CLOUD_DEPLOYMENT else "in development mode",
+        "Enabled" if app.state.auth_enabled else "Disabled",
+    )
     
     yield
     
-    # Shutdown (if needed)
-    pass
-
-# FastAPI app initialization
-app = FastAPI(
-    title="Italian Fiscal Code and VAT Number Validation API",
-    description=description,
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    lifespan=lifespan
-)
-
-# Template setup
-from pathlib import Path
-templates_dir = Path(__file__).parent / "templates"
-static_dir = Path(__file__).parent / "static"
-
-# For cloud deployments, we might not have static files
-if not IS_CLOUD_DEPLOYMENT and static_dir.exists():
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
-
-# Setup templates if available
-templates = None
-if templates_dir.exists():
-    templates = Jinja2Templates(directory=templates_dir)
+    # Shutdown
+    if jwks_refresh_task is not None:
+        jwks_refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await jwks_refresh_task
+
+
+# The web interface is only served in development, when templates are available
+WEB_INTERFACE_ENABLED = not IS_CLOUD_DEPLOYMENT and _TEMPLATES_DIR is not None
+
+
+@functools.cache
+def _get_templates() -> Jinja2Templates:
+    """Load Jinja2 (and the templates) on the first web interface request."""
+    from fastapi.templating import Jinja2Templates
+
+    # Only used when WEB_INTERFACE_ENABLED, i.e. when the templates are shipped
+    assert _TEMPLATES_DIR is not None
+    return Jinja2Templates(directory=_TEMPLATES_DIR)
+
+
+# Fiscal code / VAT number as sent by clients, only the length is checked
+# upfront (by pydantic-core), invalid codes are reported by the endpoints
+CodeStr = Annotated[str, StringConstraints(max_length=CODE_MAX_LENGTH)]
 
 
 class FiscalCodeRequest(BaseModel):
-    code: str = Field(..., description="The fiscal code to validate")
+    code: CodeStr = Field(..., description="The fiscal code to validate")
+
+
+class FiscalCodeBatchRequest(BaseModel):
+    codes: list[CodeStr] = Field(
+        ..., max_length=BATCH_MAX_SIZE, description="The fiscal codes to validate"
+    )
 
 
 class VATRequest(BaseModel):
-    partita_iva: str = Field(..., description="The VAT number to validate")
+    partita_iva: CodeStr = Field(..., description="The VAT number to validate")
 
 
 class FiscalCodeEncodeRequest(BaseModel):
-    lastname: str = Field(..., description="Last name")
-    firstname: str = Field(..., description="First name")
-    gender: str = Field(..., description="Gender (M/F)")
-    birthdate: str = Field(..., description="Birth date (various formats supported)")
-    birthplace: str = Field(..., description="Birth place name")
+    lastname: str = Field(..., max_length=TEXT_MAX_LENGTH, description="Last name")
+    firstname: str = Field(..., max_length=TEXT_MAX_LENGTH, description="First name")
+    gender: str = Field(..., max_length=TEXT_MAX_LENGTH, description="Gender (M/F)")
+    birthdate: str = Field(
+        ..., max_length=TEXT_MAX_LENGTH, description="Birth date (various formats supported)"
+    )
+    birthplace: str = Field(..., max_length=TEXT_MAX_LENGTH, description="Birth place name")
+
+
+class VATBatchRequest(BaseModel):
+    partite_iva: list[CodeStr] = Field(
+        ..., max_length=BATCH_MAX_SIZE, description="The VAT numbers to validate"
+    )
 
 
 class VATEncodeRequest(BaseModel):
-    base_number: str = Field(..., description="First 10 digits of VAT number")
+    base_number: str = Field(
+        ..., pattern=r"^[0-9]{10}$", description="First 10 digits of VAT number"
+    )
 
 
 class ValidationResponse(BaseModel):
@@ -123,88 +276,106 @@ class ValidationResponse(BaseModel):
     details: dict[str, Any] | None = None
 
 
-# Set up dependencies based on auth status
-def no_auth() -> dict[str, Any]:
-    """Dummy auth dependency when authentication is disabled."""
-    return {}
+# The auth dependencies delegate to the ones of the app serving the request,
+# chosen by create_app() based on the auth status
+async def authenticate(request: Request) -> dict[str, Any]:
+    """Require a valid Bearer token when authentication is enabled."""
+    if request.app.state.clerk_auth is None:
+        return {}
+    auth_data: dict[str, Any] = await request.app.state.clerk_auth(request)
+    return auth_data
 
-if AUTH_ENABLED:
-    auth_dependency = Depends(clerk_auth)
-    optional_auth_dependency = Depends(optional_clerk_auth)
-else:
-    auth_dependency = Depends(no_auth)
-    optional_auth_dependency = Depends(no_auth)
+
+async def authenticate_optional(request: Request) -> dict[str, Any]:
+    """Authenticate the request if it carries a Bearer token."""
+    if request.app.state.optional_clerk_auth is None:
+        return {}
+    auth_data: dict[str, Any] = await request.app.state.optional_clerk_auth(request)
+    return auth_data
 
 
-@app.get("/", response_class=HTMLResponse if templates and not IS_CLOUD_DEPLOYMENT else JSONResponse)
-async def root(request: Request = None, auth_data: dict[str, Any] = optional_auth_dependency):
+auth_dependency = Depends(authenticate)
+optional_auth_dependency = Depends(authenticate_optional)
+
+
+ENDPOINTS: dict[str, Any] = {
+    "fiscal_code": {
+        "validate": "POST /fiscal-code/validate",
+        "validate_batch": "POST /fiscal-code/validate/batch",
+        "encode": "POST /fiscal-code/encode",
+        "decode": "POST /fiscal-code/decode",
+    },
+    "vat": {
+        "validate": "POST /vat/validate",
+        "validate_batch": "POST /vat/validate/batch",
+        "encode": "POST /vat/encode",
+        "decode": "POST /vat/decode",
+    },
+}
+
+router = APIRouter()
+
+
+@router.get("/", response_class=HTMLResponse if WEB_INTERFACE_ENABLED else ORJSONResponse)
+async def root(request: Request, auth_data: dict[str, Any] = optional_auth_dependency):
     """Root endpoint - web interface in development, API info in cloud deployments."""
     # In cloud deployments, prioritize JSON API response
-    if IS_CLOUD_DEPLOYMENT or templates is None:
-        return await api_info(auth_data)
+    if not WEB_INTERFACE_ENABLED:
+        return await api_info(request, auth_data)
     
     # In development, show web interface
-    user_info = None
-    if AUTH_ENABLED and auth_data and "sub" in auth_data:
-        user_info = get_user_metadata(auth_data)
-    
-    return templates.TemplateResponse(request, "index.html", {
-        "auth_enabled": AUTH_ENABLED,
-        "user": user_info
+    return _get_templates().TemplateResponse(request, "index.html", {
+        "auth_enabled": request.app.state.auth_enabled,
+        "user": _get_user(request, auth_data) if auth_data else None
     })
 
 
-@app.get("/api", response_class=JSONResponse)
-async def api_info(auth_data: dict[str, Any] = optional_auth_dependency):
+@router.get("/api")
+async def api_info(request: Request, auth_data: dict[str, Any] = optional_auth_dependency):
     """API information endpoint."""
-    response = {
-        "name": "Italian Fiscal Code and VAT Number Validation API",
-        "version": "1.0.0",
-        "environment": "Google Cloud Run" if IS_CLOUD_DEPLOYMENT else "Development",
-        "authentication": {
-            "enabled": AUTH_ENABLED,
-            "type": "Clerk JWT Bearer Token" if AUTH_ENABLED else "None",
-        },
-        "endpoints": {
-            "fiscal_code": {
-                "validate": "POST /fiscal-code/validate",
-                "encode": "POST /fiscal-code/encode",
-                "decode": "POST /fiscal-code/decode",
-            },
-            "vat": {
-                "validate": "POST /vat/validate",
-                "encode": "POST /vat/encode",
-                "decode": "POST /vat/decode",
-            },
-        },
-    }
-    
     # Add user info if authenticated
-    if AUTH_ENABLED and auth_data and "sub" in auth_data:
-        response["user"] = get_user_metadata(auth_data)
-    
-    return response
+    user_info = _get_user(request, auth_data) if auth_data else None
+    if user_info is not None:
+        return ORJSONResponse({**request.app.state.api_info, "user": user_info})
+
+    return request.app.state.api_info_json.response(request)
 
 
-@app.post("/fiscal-code/validate", response_model=ValidationResponse)
-async def validate_fiscal_code(
+@router.post("/fiscal-code/validate", response_model=ValidationResponse)
+def validate_fiscal_code(
     request: FiscalCodeRequest,
     auth_data: dict[str, Any] = auth_dependency
 ):
     """Validate an Italian fiscal code."""
     try:
-        is_valid = codicefiscale.is_valid(request.code)
-        return ValidationResponse(
-            valid=is_valid,
-            code=request.code,
-            details={"is_omocode": codicefiscale.is_omocode(request.code)} if is_valid else None,
-        )
+        is_valid = _cf_is_valid(request.code)
+        # Returned as a response so FastAPI skips re-validating the payload,
+        # ValidationResponse is still used for the OpenAPI schema
+        return ORJSONResponse({
+            "valid": is_valid,
+            "code": request.code,
+            "details": {
+                "is_omocode": _cf_is_omocode(request.code)
+            } if is_valid else None,
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/fiscal-code/validate/batch")
+def validate_fiscal_codes(
+    request: FiscalCodeBatchRequest,
+    auth_data: dict[str, Any] = auth_dependency
+):
+    """Validate many Italian fiscal codes in a single request."""
+    try:
+        return ORJSONResponse({"results": list(map(_cf_is_valid, request.codes))})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.post("/fiscal-code/encode")
-async def encode_fiscal_code(
+@router.post("/fiscal-code/encode")
+def encode_fiscal_code(
     request: FiscalCodeEncodeRequest,
     auth_data: dict[str, Any] = auth_dependency
 ):
@@ -217,88 +388,181 @@ async def encode_fiscal_code(
             birthdate=request.birthdate,
             birthplace=request.birthplace,
         )
-        return {"code": encoded_code}
+        return ORJSONResponse({"code": encoded_code})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.post("/fiscal-code/decode")
-async def decode_fiscal_code(
+@router.post("/fiscal-code/decode")
+def decode_fiscal_code(
     request: FiscalCodeRequest,
+    http_request: Request,
     auth_data: dict[str, Any] = auth_dependency
 ):
     """Decode a fiscal code to extract personal data."""
     try:
-        decoded_data = codicefiscale.decode(request.code)
-        return decoded_data
+        decoded_data = _cf_decode(request.code)
+        return _decoded_response(http_request, dict(decoded_data))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.post("/vat/validate", response_model=ValidationResponse)
-async def validate_vat(
+@router.post("/vat/validate", response_model=ValidationResponse)
+def validate_vat(
     request: VATRequest,
     auth_data: dict[str, Any] = auth_dependency
 ):
     """Validate an Italian VAT number (Partita IVA)."""
     try:
-        is_valid = partitaiva.is_valid(request.partita_iva)
-        return ValidationResponse(
-            valid=is_valid,
-            code=request.partita_iva,
-            details=partitaiva.decode(request.partita_iva) if is_valid else None,
-        )
+        # decode() already validates the number, no need for is_valid() too
+        decoded_data = partitaiva.decode(request.partita_iva)
+        is_valid = decoded_data["valid"]
+        return ORJSONResponse({
+            "valid": is_valid,
+            "code": request.partita_iva,
+            "details": decoded_data if is_valid else None,
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.post("/vat/encode")
-async def encode_vat(
+@router.post("/vat/validate/batch")
+def validate_vats(
+    request: VATBatchRequest,
+    auth_data: dict[str, Any] = auth_dependency
+):
+    """Validate many Italian VAT numbers in a single request."""
+    try:
+        return ORJSONResponse({"results": partitaiva.is_valid_many(request.partite_iva)})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/vat/encode")
+def encode_vat(
     request: VATEncodeRequest,
     auth_data: dict[str, Any] = auth_dependency
 ):
     """Generate a complete VAT number from base 10 digits."""
     try:
         encoded_vat = partitaiva.encode(request.base_number)
-        return {"partita_iva": encoded_vat}
+        return ORJSONResponse({"partita_iva": encoded_vat})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.post("/vat/decode")
-async def decode_vat(
+@router.post("/vat/decode")
+def decode_vat(
     request: VATRequest,
+    http_request: Request,
     auth_data: dict[str, Any] = auth_dependency
 ):
     """Decode a VAT number to extract its components."""
     try:
         decoded_data = partitaiva.decode(request.partita_iva)
-        return decoded_data
+        return _decoded_response(http_request, decoded_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
 # Health check endpoint - always available
-@app.get("/health")
-async def health_check():
+@router.get("/health")
+async def health_check(request: Request):
     """Health check endpoint."""
-    health_info = {
+    return request.app.state.health_json.response(request)
+
+
+def create_app(clerk: ClerkAuth | None = None) -> FastAPI:
+    """
+    Create the API application.
+
+    Args:
+        clerk: The Clerk authentication handler, None to disable authentication
+
+    Returns:
+        The FastAPI application
+    """
+    auth_enabled = clerk is not None
+    environment = "Google Cloud Run" if IS_CLOUD_DEPLOYMENT else "Development"
+
+    # Build description based on environment
+    description = (
+        "REST API for validating Italian fiscal codes (Codice Fiscale) and VAT numbers (Partita IVA)"
+        + (
+            "\n\n**Authentication**: This API uses Clerk authentication. Include your Bearer token in the Authorization header."
+            if auth_enabled else ""
+        )
+        + ("\n\n**Deployed on**: Google Cloud Run" if IS_CLOUD_DEPLOYMENT else "")
+    )
+
+    app = FastAPI(
+        title="Italian Fiscal Code and VAT Number Validation API",
+        description=description,
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+
+    # Decoded fiscal codes (with all their omocodes) compress very well
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=4)
+
+    # For cloud deployments, we might not have static files
+    if not IS_CLOUD_DEPLOYMENT and _STATIC_DIR is not None:
+        from fastapi.staticfiles import StaticFiles
+
+        app.mount("/static", StaticFiles(directory=_STATIC_DIR), name="static")
+
+    app.include_router(router)
+
+    app.state.clerk = clerk
+    app.state.auth_enabled = auth_enabled
+    if auth_enabled:
+        from .auth import create_clerk_dependency, get_user_metadata
+
+        # A single ClerkAuth (and JWKS cache) is shared by both dependencies
+        app.state.clerk_auth = create_clerk_dependency(auto_error=True, clerk_auth=clerk)
+        app.state.optional_clerk_auth = create_clerk_dependency(auto_error=False, clerk_auth=clerk)
+        app.state.get_user_metadata = get_user_metadata
+    else:
+        app.state.clerk_auth = None
+        app.state.optional_clerk_auth = None
+        app.state.get_user_metadata = None
+
+    # Static endpoint payloads, serialized once at startup
+    app.state.api_info = {
+        "name": "Italian Fiscal Code and VAT Number Validation API",
+        "version": "1.0.0",
+        "environment": environment,
+        "authentication": {
+            "enabled": auth_enabled,
+            "type": "Clerk JWT Bearer Token" if auth_enabled else "None",
+        },
+        "endpoints": ENDPOINTS,
+    }
+    health_info: dict[str, Any] = {
         "status": "healthy",
-        "environment": "Google Cloud Run" if IS_CLOUD_DEPLOYMENT else "Development",
-        "authentication_enabled": AUTH_ENABLED
+        "environment": environment,
+        "authentication_enabled": auth_enabled
     }
-    
     if IS_CLOUD_DEPLOYMENT:
         # Add cloud-specific health info
         health_info["service_name"] = os.getenv("K_SERVICE", "codice-fiscale-service")
         health_info["service_revision"] = os.getenv("K_REVISION", "unknown")
-    
-    return health_info
+
+    app.state.api_info_json = StaticJSON(app.state.api_info)
+    app.state.health_json = StaticJSON(health_info)
+    return app
 
 
+app = create_app(clerk)
 
 
 # For local development
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # uvicorn picks uvloop and httptools when installed (uvicorn[standard])
+    uvicorn.run(app, host="0.0.0.0", port=8000, access_log=False)
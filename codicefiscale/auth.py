@@ -1,40 +1,71 @@
 from __future__ import annotations
 
-import os
-from typing import Any, Optional
+import asyncio
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from ._env import get_non_empty_env
+
+# How long the JWKS fetched from Clerk is kept before being fetched again
+JWKS_CACHE_TTL = 3600
+
+# Verified token claims are reused for repeated requests carrying the same token
+# (the TTL can be overridden with the CLERK_VERIFY_CACHE_TTL environment variable)
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAXSIZE = 4096
+
+# Claims every Clerk token must carry, with their name in error messages
+REQUIRED_CLAIMS = {"sub": "subject", "iss": "issuer", "exp": "expiration"}
 
 try:
     import jwt
     from dotenv import load_dotenv
-    from fastapi import Depends, HTTPException, Request
-    from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-    
-    # Load environment variables from .env file
-    load_dotenv()
+    from fastapi import HTTPException, Request
+    from fastapi.concurrency import run_in_threadpool
 except ImportError as e:
     raise ImportError(
         "Authentication dependencies not installed. "
         "Install with: pip install 'python-codicefiscale[api]'"
     ) from e
 
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _get_publishable_key() -> str | None:
+    """Get the Clerk publishable key, trying both environment variable names."""
+    return (
+        get_non_empty_env("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY")
+        or get_non_empty_env("CLERK_PUBLISHABLE_KEY")
+    )
+
+
+def _get_token_cache_ttl() -> float:
+    """Get the verification cache TTL, falling back to the default if unset or invalid."""
+    value = get_non_empty_env("CLERK_VERIFY_CACHE_TTL")
+    if value is None:
+        return TOKEN_CACHE_TTL
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        logger.warning("Invalid CLERK_VERIFY_CACHE_TTL %r, using %ss", value, TOKEN_CACHE_TTL)
+        return TOKEN_CACHE_TTL
+
 
 class ClerkAuth:
     """Clerk authentication handler for FastAPI."""
     
-    def __init__(self, publishable_key: Optional[str] = None, secret_key: Optional[str] = None):
-        # Try both environment variable names for publishable key
-        # Filter out empty strings
-        def _get_non_empty_env(key: str) -> Optional[str]:
-            value = os.getenv(key)
-            return value if value and value.strip() else None
-        
-        self.publishable_key = (
-            publishable_key 
-            or _get_non_empty_env("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY")
-            or _get_non_empty_env("CLERK_PUBLISHABLE_KEY")
-        )
+    def __init__(self, publishable_key: str | None = None, secret_key: str | None = None):
+        self.publishable_key = publishable_key or _get_publishable_key()
         
-        self.secret_key = secret_key or os.getenv("CLERK_SECRET_KEY") or None
+        self.secret_key = secret_key or get_non_empty_env("CLERK_SECRET_KEY")
         
         if not self.publishable_key:
             raise ValueError(
@@ -49,109 +80,206 @@ class ClerkAuth:
             raise ValueError("Invalid Clerk publishable key format")
         
         self.instance_id = parts[2]
-        self.jwks_url = f"https://{self.instance_id}.clerk.accounts.dev/.well-known/jwks.json"
-        
+        self.issuer = f"https://{self.instance_id}.clerk.accounts.dev"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+
+        # The JWKS is fetched lazily and cached in-process already parsed, so a
+        # warm verification is a single RSA operation. The per-kid key cache
+        # stays off: it never expires, so rotated out keys would stay trusted.
+        self._jwks_client = jwt.PyJWKClient(
+            self.jwks_url,
+            cache_keys=False,
+            lifespan=JWKS_CACHE_TTL,
+        )
+        # Keyed by the token SHA-256 digest, so raw tokens are not kept around
+        self._token_cache: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+        self._token_cache_ttl = _get_token_cache_ttl()
+
+    def refresh_signing_keys(self) -> None:
+        """Fetch the JWKS again, replacing the cached key set on success."""
+        # On a failed fetch the cached key set is left in place, so an outage
+        # does not push every request onto a synchronous fetch
+        self._jwks_client.get_jwk_set(refresh=True)
+
+    def _get_signing_key(self, token: str) -> Any:
+        """Get the public key matching the token "kid" from the cached JWKS."""
+        return self._jwks_client.get_signing_key_from_jwt(token).key
+
+    def get_cached_claims(self, token: str) -> dict[str, Any] | None:
+        """Get the claims of a recently verified token, None if not cached."""
+        key = hashlib.sha256(token.encode()).digest()
+        with self._token_cache_lock:
+            cached = self._token_cache.get(key)
+            if cached is None:
+                return None
+            expires_at, decoded = cached
+            if expires_at > time.time():
+                self._token_cache.move_to_end(key)
+                return decoded
+            del self._token_cache[key]
+            return None
+
     def verify_token(self, token: str) -> dict[str, Any]:
-        """Verify and decode a Clerk JWT token."""
+        """Verify and decode a Clerk JWT token, reusing recent verifications."""
+        cached = self.get_cached_claims(token)
+        if cached is not None:
+            return cached
+
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        decoded = self._decode_token(token)
+
+        # Never keep the claims around longer than the token itself is valid
+        expires_at = now + self._token_cache_ttl
+        exp = decoded.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        with self._token_cache_lock:
+            self._token_cache[key] = (expires_at, decoded)
+            if len(self._token_cache) > TOKEN_CACHE_MAXSIZE:
+                self._token_cache.popitem(last=False)
+        return decoded
+
+    def _decode_token(self, token: str) -> dict[str, Any]:
+        """Verify the token signature and claims."""
         try:
-            # For production, you should fetch and cache the JWKS
-            # For this example, we'll decode without verification (NOT RECOMMENDED FOR PRODUCTION)
-            decoded = jwt.decode(
+            signing_key = self._get_signing_key(token)
+            # PyJWT checks the expiry, the issuer and the required claims
+            # while decoding, the payload is only parsed once. Clerk session
+            # tokens are not bound to an audience, so "aud" is not checked.
+            return jwt.decode(
                 token,
-                options={"verify_signature": False},  # DANGER: Only for demo!
-                algorithms=["RS256"]
+                signing_key,
+                algorithms=["RS256"],
+                issuer=self.issuer,
+                options={"require": list(REQUIRED_CLAIMS), "verify_aud": False},
             )
             
-            # Validate basic token structure
-            if "sub" not in decoded:
-                raise ValueError("Token missing subject claim")
-            
-            if "iss" not in decoded:
-                raise ValueError("Token missing issuer claim")
-            
-            # Validate issuer matches Clerk instance
-            expected_issuer = f"https://{self.instance_id}.clerk.accounts.dev"
-            if decoded["iss"] != expected_issuer:
-                raise ValueError(f"Invalid issuer. Expected {expected_issuer}")
-            
-            return decoded
-            
+        except jwt.MissingRequiredClaimError as e:
+            raise HTTPException(
+                status_code=401, detail=f"Token missing {REQUIRED_CLAIMS[e.claim]} claim"
+            ) from e
+        except jwt.InvalidIssuerError as e:
+            raise HTTPException(
+                status_code=401, detail=f"Invalid issuer. Expected {self.issuer}"
+            ) from e
         except jwt.InvalidTokenError as e:
-            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}") from e
+            raise HTTPException(status_code=401, detail=f"Invalid token: {e}") from e
+        except jwt.PyJWKClientConnectionError as e:
+            raise HTTPException(status_code=503, detail="Unable to fetch signing keys") from e
+        except jwt.PyJWKClientError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {e}") from e
         except ValueError as e:
             raise HTTPException(status_code=401, detail=str(e)) from e
 
 
-def create_clerk_dependency(auto_error: bool = True):
+@functools.cache
+def _get_clerk(publishable_key: str) -> ClerkAuth:
+    """Get the ClerkAuth (and its JWKS cache) shared by every user of a key."""
+    return ClerkAuth(publishable_key)
+
+
+async def refresh_signing_keys_periodically(
+    clerk_auth: ClerkAuth, interval: float = JWKS_CACHE_TTL / 2
+) -> None:
+    """Keep the cached JWKS fresh in the background, off the request path."""
+    while True:
+        try:
+            await run_in_threadpool(clerk_auth.refresh_signing_keys)
+        except Exception:
+            # Anything (a non-JSON error page, a socket error) must not stop
+            # the refresh for good, the next attempt may well succeed
+            logger.exception("Unable to refresh Clerk JWKS")
+        await asyncio.sleep(interval)
+
+
+def create_clerk_dependency(auto_error: bool = True, clerk_auth: ClerkAuth | None = None):
     """Create a Clerk authentication dependency function."""
-    clerk_auth = ClerkAuth()
-    bearer = HTTPBearer(auto_error=auto_error)
+    clerk_auth = clerk_auth or _get_clerk(_get_publishable_key())
     
-    async def clerk_dependency(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> dict[str, Any]:
-        if credentials is None:
+    # The Authorization header is parsed directly rather than through
+    # HTTPBearer, which adds a nested dependency to every protected request,
+    # its errors are kept the same
+    async def clerk_dependency(request: Request) -> dict[str, Any]:
+        authorization = request.headers.get("authorization") or ""
+        scheme, _, token = authorization.partition(" ")
+        if not (scheme and token):
             if auto_error:
                 raise HTTPException(
-                    status_code=401, 
-                    detail="Authorization header required"
+                    status_code=401,
+                    detail="Not authenticated",
+                    headers={"WWW-Authenticate": "Bearer"},
                 )
             return {}
         
-        if credentials.scheme.lower() != "bearer":
+        if scheme.lower() != "bearer":
             if auto_error:
                 raise HTTPException(
-                    status_code=401, 
-                    detail="Invalid authentication scheme"
+                    status_code=401,
+                    detail="Invalid authentication credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
                 )
             return {}
         
-        return clerk_auth.verify_token(credentials.credentials)
+        token = token.strip()
+        claims = clerk_auth.get_cached_claims(token)
+        if claims is None:
+            # A full verification is an RSA operation and may fetch the JWKS
+            # (blocking I/O), so it runs in the threadpool, off the event loop
+            claims = await run_in_threadpool(clerk_auth.verify_token, token)
+        return claims
     
     return clerk_dependency
 
 
+def dummy_auth() -> dict[str, Any]:
+    """Dummy auth dependency used when no credentials are configured."""
+    return {}
+
+
 # Global authentication dependencies - only create if credentials are available
+clerk: ClerkAuth | None = None
 try:
     # Check if credentials exist before creating dependencies
-    def _get_non_empty_env(key: str) -> Optional[str]:
-        value = os.getenv(key)
-        return value if value and value.strip() else None
-    
-    if (_get_non_empty_env("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY") or 
-        _get_non_empty_env("CLERK_PUBLISHABLE_KEY")):
-        clerk_auth = create_clerk_dependency(auto_error=True)
-        optional_clerk_auth = create_clerk_dependency(auto_error=False)
+    _publishable_key = _get_publishable_key()
+    if _publishable_key:
+        # A single ClerkAuth (and JWKS cache) is shared by both dependencies
+        clerk = _get_clerk(_publishable_key)
+        clerk_auth = create_clerk_dependency(auto_error=True, clerk_auth=clerk)
+        optional_clerk_auth = create_clerk_dependency(auto_error=False, clerk_auth=clerk)
     else:
-        # Create dummy dependencies when no credentials
-        def dummy_auth() -> dict[str, Any]:
-            return {}
+        # Use dummy dependencies when no credentials
         clerk_auth = dummy_auth
         optional_clerk_auth = dummy_auth
 except (ValueError, ImportError):
     # Fallback to dummy dependencies if initialization fails
-    def dummy_auth() -> dict[str, Any]:
-        return {}
     clerk_auth = dummy_auth
     optional_clerk_auth = dummy_auth
 
 
-def get_user_id(auth_data: dict[str, Any]) -> Optional[str]:
+def get_user_id(auth_data: dict[str, Any]) -> str | None:
     """Extract user ID from Clerk auth data."""
     return auth_data.get("sub")
 
 
-def get_user_email(auth_data: dict[str, Any]) -> Optional[str]:
+def get_user_email(auth_data: dict[str, Any]) -> str | None:
     """Extract user email from Clerk auth data."""
     return auth_data.get("email")
 
 
+# Claims exposed as user metadata, with the name they are exposed under
+_META_MAP: tuple[tuple[str, str], ...] = (
+    ("sub", "user_id"),
+    ("email", "email"),
+    ("name", "name"),
+    ("given_name", "given_name"),
+    ("family_name", "family_name"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+)
+
+
 def get_user_metadata(auth_data: dict[str, Any]) -> dict[str, Any]:
     """Extract user metadata from Clerk auth data."""
-    return {
-        "user_id": get_user_id(auth_data),
-        "email": get_user_email(auth_data),
-        "name": auth_data.get("name"),
-        "given_name": auth_data.get("given_name"),
-        "family_name": auth_data.get("family_name"),
-        "created_at": auth_data.get("created_at"),
-        "updated_at": auth_data.get("updated_at"),
-    }
\ No newline at end of file
+    return {key: auth_data.get(claim) for claim, key in _META_MAP}
\ No newline at end of file
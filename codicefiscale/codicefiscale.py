@@ -53,6 +53,8 @@ _CIN: dict[str, tuple[int, int]] = {
     "Y": (24, 24),
     "Z": (25, 23),
 }
+_CIN_ODD: dict[str, int] = {char: values[1] for char, values in _CIN.items()}
+_CIN_EVEN: dict[str, int] = {char: values[0] for char, values in _CIN.items()}
 _CIN_REMAINDERS: list[str] = list(string.ascii_uppercase)
 
 _OMOCODIA: dict[str, str] = {
@@ -94,6 +96,8 @@ CODICEFISCALE_RE: Pattern[str] = re.compile(
     re.IGNORECASE,
 )
 
+_PROVINCE_SEPARATOR_RE: Pattern[str] = re.compile(r",|\(")
+
 
 def _get_consonants(s: str) -> list[str]:
     return [char for char in s if char in _CONSONANTS]
@@ -315,7 +319,7 @@ def encode_birthplace(
     if not birthplace:
         raise ValueError("[codicefiscale] 'birthplace' argument cant be None")
 
-    birthplace_without_province = re.split(r",|\(", birthplace)[0]
+    birthplace_without_province = _PROVINCE_SEPARATOR_RE.split(birthplace, 1)[0]
     birthplace_data = _get_birthplace(
         birthplace,
         birthdate,
@@ -353,9 +357,9 @@ def encode_cin(code: str) -> str:
             f"[codicefiscale] 'code' length must be 15 or 16, not: {code_len}"
         )
 
-    cin_tot = 0
-    for i, char in enumerate(code[0:15]):
-        cin_tot += _CIN[char][int(bool((i + 1) % 2))]
+    cin_tot = sum(map(_CIN_ODD.__getitem__, code[0:15:2])) + sum(
+        map(_CIN_EVEN.__getitem__, code[1:15:2])
+    )
     cin_code = _CIN_REMAINDERS[cin_tot % 26]
 
     # print(cin_code)
@@ -527,6 +531,17 @@ def is_valid(code: str) -> bool:
     :returns: True if the specified code is valid, False otherwise.
     :rtype: boolean
     """
+    # reject well-formed codes with a wrong CIN before decode()
+    # does the (much slower) birthdate and birthplace lookups,
+    # only for ASCII codes, as the CIN table has no other digits
+    if (
+        isinstance(code, str)
+        and code.isascii()
+        and code.isupper()
+        and CODICEFISCALE_RE.fullmatch(code)
+        and encode_cin(code) != code[15]
+    ):
+        return False
     try:
         decode(code)
         return True
@@ -1,6 +1,36 @@
 from __future__ import annotations
 
-import re
+import functools
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Number of VAT numbers whose validation results are memoized, the same
+# numbers tend to be checked over and over (form retries, duplicate rows)
+_CACHE_SIZE = 65536
+
+_DECODE_KEYS: tuple[str, ...] = (
+    "code",
+    "valid",
+    "base_number",
+    "check_digit",
+    "calculated_check_digit",
+)
+
+
+# Contribution of each ASCII digit in an odd (1-based) position: its value
+_SINGLE: bytes = bytes.maketrans(b"0123456789", bytes(range(10)))
+
+# Contribution of a digit in an even position: doubled, then its digits summed
+_DOUBLED: bytes = bytes.maketrans(
+    b"0123456789", bytes(d * 2 - 9 if d * 2 > 9 else d * 2 for d in range(10))
+)
+
+
+def _is_digits(value: str, length: int) -> bool:
+    """Check that value is made of exactly length ASCII digits."""
+    return len(value) == length and value.isascii() and value.isdigit()
 
 
 def _calculate_check_digit(vat_number: str) -> str:
@@ -8,24 +38,41 @@ def _calculate_check_digit(vat_number: str) -> str:
     if len(vat_number) != 10:
         raise ValueError("VAT number must be 10 digits long (excluding check digit)")
 
-    odd_sum = 0
-    even_sum = 0
+    if not (vat_number.isascii() and vat_number.isdigit()):
+        raise ValueError("VAT number must contain only digits")
+
+    # odd positions (1-based indexing) count as they are, even ones doubled
+    digits = vat_number.encode("ascii")
+    total = sum(digits[0::2].translate(_SINGLE)) + sum(digits[1::2].translate(_DOUBLED))
+    check_digit = (10 - (total % 10)) % 10
+    return str(check_digit)
+
 
-    for i, digit in enumerate(vat_number):
-        if not digit.isdigit():
-            raise ValueError("VAT number must contain only digits")
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _check_digits(vat_number: str) -> tuple[bool, str, str, str]:
+    """Check the digit of a cleaned 11 digits VAT number, cached by number."""
+    base_number = vat_number[:10]
+    check_digit = vat_number[10]
+    calculated_check_digit = _calculate_check_digit(base_number)
+    return (
+        check_digit == calculated_check_digit,
+        base_number,
+        check_digit,
+        calculated_check_digit,
+    )
 
-        digit_val = int(digit)
 
-        if i % 2 == 0:  # odd position (1-based indexing)
-            odd_sum += digit_val
-        else:  # even position
-            doubled = digit_val * 2
-            even_sum += doubled if doubled < 10 else doubled - 9
+def _validate_and_decode(
+    partita_iva: str,
+) -> tuple[str, bool, str | None, str | None, str | None]:
+    """Validate and decode a VAT number into a tuple of components."""
+    # Clean the input, any (Unicode) whitespace is ignored
+    cleaned_piva = "".join(partita_iva.split()) if isinstance(partita_iva, str) else ""
 
-    total = odd_sum + even_sum
-    check_digit = (10 - (total % 10)) % 10
-    return str(check_digit)
+    # Only well-formed numbers reach the cache, junk never takes up its slots
+    if not _is_digits(cleaned_piva, 11):
+        return (partita_iva, False, None, None, None)
+    return (partita_iva, *_check_digits(cleaned_piva))
 
 
 def is_valid(partita_iva: str) -> bool:
@@ -38,26 +85,23 @@ def is_valid(partita_iva: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    if not partita_iva:
+    # Too short to hold 11 digits, no need to clean it
+    if not isinstance(partita_iva, str) or len(partita_iva) < 11:
         return False
+    return _validate_and_decode(partita_iva)[1]
 
-    # Remove spaces and convert to uppercase
-    partita_iva = re.sub(r"\s+", "", partita_iva.upper())
 
-    # Check if it's exactly 11 digits
-    if not re.match(r"^\d{11}$", partita_iva):
-        return False
+def is_valid_many(partite_iva: Iterable[str]) -> list[bool]:
+    """
+    Check which of the given strings are valid Italian VAT numbers.
 
-    # Extract first 10 digits and check digit
-    base_number = partita_iva[:10]
-    provided_check_digit = partita_iva[10]
+    Args:
+        partite_iva: The VAT numbers to validate
 
-    # Calculate expected check digit
-    try:
-        expected_check_digit = _calculate_check_digit(base_number)
-        return provided_check_digit == expected_check_digit
-    except ValueError:
-        return False
+    Returns:
+        A list with the validation result of each VAT number, in order
+    """
+    return list(map(is_valid, partite_iva))
 
 
 def encode(
@@ -75,7 +119,7 @@ def encode(
     Raises:
         ValueError: If base_number is not exactly 10 digits
     """
-    if not re.match(r"^\d{10}$", base_number):
+    if not _is_digits(base_number, 10):
         raise ValueError("Base number must be exactly 10 digits")
 
     check_digit = _calculate_check_digit(base_number)
@@ -92,31 +136,4 @@ def decode(partita_iva: str) -> dict[str, str | bool | None]:
     Returns:
         Dictionary with validation results and components
     """
-    # Clean the input
-    cleaned_piva = re.sub(r"\s+", "", partita_iva.upper()) if partita_iva else ""
-
-    result = {
-        "code": partita_iva,
-        "valid": False,
-        "base_number": None,
-        "check_digit": None,
-        "calculated_check_digit": None,
-    }
-
-    if not cleaned_piva or not re.match(r"^\d{11}$", cleaned_piva):
-        return result
-
-    base_number = cleaned_piva[:10]
-    check_digit = cleaned_piva[10]
-
-    result["base_number"] = base_number
-    result["check_digit"] = check_digit
-
-    try:
-        calculated_check_digit = _calculate_check_digit(base_number)
-        result["calculated_check_digit"] = calculated_check_digit
-        result["valid"] = check_digit == calculated_check_digit
-    except ValueError:
-        pass
-
-    return result
+    return dict(zip(_DECODE_KEYS, _validate_and_decode(partita_iva), strict=True))
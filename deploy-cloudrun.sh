@@ -194,7 +194,7 @@ ENV PYTHONPATH=/app
 EXPOSE 8080
 
 # Start the application
-CMD exec uvicorn codicefiscale.app:app --host 0.0.0.0 --port ${PORT:-8080}
+CMD exec python main-cloudrun.py
 EOF
 
 # Show deployment configuration
@@ -5,6 +5,7 @@ Cloud Run entry point for Italian Fiscal Code & VAT Validation API.
 This is a simple, direct approach for Cloud Run deployment.
 """
 
+import logging
 import os
 
 # Set Cloud Function environment flag (for compatibility)
@@ -19,6 +20,8 @@ from codicefiscale.app import app
 if __name__ == "__main__":
     import uvicorn
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Get port from environment variable (Cloud Run sets this)
     port = int(os.environ.get("PORT", 8080))
     
@@ -32,5 +35,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=port,
         log_level="info",
-        access_log=True
+        # Cloud Run already logs every request, skip uvicorn's access log
+        access_log=False
     )
\ No newline at end of file
@@ -25,9 +25,11 @@ def generate_requirements():
     
     # Cloud Run specific dependencies
     cloud_run_deps = [
-        "functions-framework>=3.9.2",
         "gunicorn>=22.0.0",
         "uvicorn[standard]>=0.35.0",
+        # Picked up automatically by uvicorn for the event loop / HTTP parser
+        'uvloop>=0.19.0; sys_platform != "win32"',
+        "httptools>=0.6.0",
     ]
     
     # Generate requirements.txt content
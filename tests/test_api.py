@@ -1,39 +1,38 @@
 
-import os
 import pytest
-from unittest.mock import patch
+
+from codicefiscale import partitaiva
+
+VALID_VAT = partitaiva.encode("0123456789")
 
 try:
     from fastapi.testclient import TestClient
 
-    # Import and configure app without authentication for testing
-    # Clear Clerk environment variables to disable auth
-    with patch.dict(os.environ, {
-        'CLERK_PUBLISHABLE_KEY': '',
-        'NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY': '',
-        'CLERK_SECRET_KEY': ''
-    }):
-        with patch('codicefiscale.app.load_dotenv'), patch('codicefiscale.auth.load_dotenv'):
-            import importlib
-            import codicefiscale.auth
-            import codicefiscale.app
-            importlib.reload(codicefiscale.auth)
-            importlib.reload(codicefiscale.app)
-            
-            from codicefiscale.app import app
+    from codicefiscale.app import create_app
+
+    # Build an app without authentication for testing
+    app = create_app()
     
     FASTAPI_AVAILABLE = True
 except ImportError:
     FASTAPI_AVAILABLE = False
 
 
+@pytest.fixture(scope="module")
+def client():
+    """Test client shared by the whole module, the app starts up only once."""
+    with TestClient(app) as client:
+        yield client
+
+
 @pytest.mark.skipif(not FASTAPI_AVAILABLE, reason="FastAPI dependencies not available")
 class TestAPI:
     """Test the FastAPI validation endpoints."""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup_client(self, client):
         """Setup test client."""
-        self.client = TestClient(app)
+        self.client = client
 
     def test_root_endpoint(self):
         """Test the API info endpoint returns API information."""
@@ -53,6 +52,23 @@ class TestAPI:
         data = response.json()
         assert data["status"] == "healthy"
 
+    def test_health_check_etag(self):
+        """Test the health check endpoint supports conditional requests."""
+        response = self.client.get("/health")
+        etag = response.headers["etag"]
+
+        response = self.client.get("/health", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        # Weak validators, lists and wildcards match too
+        for if_none_match in (f"W/{etag}", f'"other", {etag}', "*"):
+            response = self.client.get("/health", headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304
+
+        response = self.client.get("/health", headers={"If-None-Match": '"other"'})
+        assert response.status_code == 200
+
     def test_validate_fiscal_code_valid(self):
         """Test fiscal code validation with valid code."""
         # Use a known valid fiscal code from existing tests
@@ -67,6 +83,28 @@ class TestAPI:
         assert data["valid"] is True
         assert data["code"] == valid_code
         assert "details" in data
+        assert data["details"]["is_omocode"] is False
+
+    def test_validate_fiscal_code_omocode(self):
+        """Test fiscal code validation with an omocode."""
+        response = self.client.post(
+            "/fiscal-code/validate",
+            json={"code": "CCCFBA85D03L21VE"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["valid"] is True
+        assert data["details"]["is_omocode"] is True
+
+    def test_validate_fiscal_code_keeps_no_decoded_data(self):
+        """Test validation does not fill the (much larger) decoded data cache."""
+        from codicefiscale.app import _cf_decode
+
+        _cf_decode.cache_clear()
+        for code in ("CCCFBA85D03L219P", "CCCFBA85D03L21VE", "cccfba85d03l21ve"):
+            response = self.client.post("/fiscal-code/validate", json={"code": code})
+            assert response.json()["details"]["is_omocode"] is code.endswith("VE")
+        assert _cf_decode.cache_info().currsize == 0
 
     def test_validate_fiscal_code_invalid(self):
         """Test fiscal code validation with invalid code."""
@@ -126,20 +164,29 @@ class TestAPI:
         assert "birthdate" in data
         assert "birthplace" in data
 
+    def test_decode_fiscal_code_gzip(self):
+        """Test large responses are gzip-compressed when accepted."""
+        response = self.client.post(
+            "/fiscal-code/decode",
+            json={"code": "CCCFBA85D03L219P"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["code"] == "CCCFBA85D03L219P"
+
     def test_validate_vat_valid(self):
         """Test VAT validation with valid number."""
         # Create a valid VAT number first
-        from codicefiscale import partitaiva
-        valid_vat = partitaiva.encode("0123456789")
 
         response = self.client.post(
             "/vat/validate",
-            json={"partita_iva": valid_vat}
+            json={"partita_iva": VALID_VAT}
         )
         assert response.status_code == 200
         data = response.json()
         assert data["valid"] is True
-        assert data["code"] == valid_vat
+        assert data["code"] == VALID_VAT
         assert "details" in data
 
     def test_validate_vat_invalid(self):
@@ -177,16 +224,14 @@ class TestAPI:
             "/vat/encode",
             json={"base_number": invalid_base}
         )
-        assert response.status_code == 400
+        assert response.status_code == 422  # Validation error
 
     def test_decode_vat(self):
         """Test VAT decoding."""
-        from codicefiscale import partitaiva
-        valid_vat = partitaiva.encode("0123456789")
 
         response = self.client.post(
             "/vat/decode",
-            json={"partita_iva": valid_vat}
+            json={"partita_iva": VALID_VAT}
         )
         assert response.status_code == 200
         data = response.json()
@@ -196,6 +241,72 @@ class TestAPI:
         assert "check_digit" in data
         assert data["valid"] is True
 
+    def test_validate_fiscal_codes_batch(self):
+        """Test batch fiscal code validation."""
+        response = self.client.post(
+            "/fiscal-code/validate/batch",
+            json={"codes": ["CCCFBA85D03L219P", "INVALID123", "CCCFBA85D03L219P"]}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"results": [True, False, True]}
+
+        # A code with non-ASCII digits must not fail the whole batch
+        response = self.client.post(
+            "/fiscal-code/validate/batch",
+            json={"codes": ["CCCFBA\u0668\u0665D03L219P", "CCCFBA85D03L219P"]}
+        )
+        assert response.status_code == 200
+        assert response.json()["results"][1] is True
+
+        response = self.client.post(
+            "/fiscal-code/validate/batch",
+            json={"codes": ["CCCFBA85D03L219P"] * 10001}
+        )
+        assert response.status_code == 422  # Validation error
+
+    def test_validate_vats_batch(self):
+        """Test batch VAT validation."""
+
+        response = self.client.post(
+            "/vat/validate/batch",
+            json={"partite_iva": [VALID_VAT, "12345678901", VALID_VAT]}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"results": [True, False, True]}
+
+        response = self.client.post(
+            "/vat/validate/batch",
+            json={"partite_iva": [VALID_VAT] * 10001}
+        )
+        assert response.status_code == 422  # Validation error
+
+    def test_decode_msgpack(self):
+        """Test decoded data is served as msgpack when requested."""
+        ormsgpack = pytest.importorskip("ormsgpack")
+
+        headers = {"Accept": "application/x-msgpack"}
+        response = self.client.post(
+            "/vat/decode", json={"partita_iva": VALID_VAT}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-msgpack"
+        assert ormsgpack.unpackb(response.content) == partitaiva.decode(VALID_VAT)
+
+        response = self.client.post(
+            "/fiscal-code/decode", json={"code": "CCCFBA85D03L219P"}, headers=headers
+        )
+        assert response.status_code == 200
+        assert ormsgpack.unpackb(response.content)["code"] == "CCCFBA85D03L219P"
+
+        # JSON unless msgpack is accepted, responses vary on Accept either way
+        for accept in ("application/json", "application/x-msgpack;q=0, application/json"):
+            response = self.client.post(
+                "/vat/decode", json={"partita_iva": VALID_VAT}, headers={"Accept": accept}
+            )
+            assert response.headers["content-type"] == "application/json"
+            assert "Accept" in response.headers["vary"]
+            assert response.json() == partitaiva.decode(VALID_VAT)
+
     def test_missing_request_fields(self):
         """Test API endpoints with missing required fields."""
         # Test fiscal code validation without code
@@ -206,18 +317,30 @@ class TestAPI:
         response = self.client.post("/vat/validate", json={})
         assert response.status_code == 422  # Validation error
 
+        # Test oversized codes are rejected before validation
+        response = self.client.post("/fiscal-code/validate", json={"code": "A" * 1000})
+        assert response.status_code == 422  # Validation error
+
         # Test fiscal code encoding with missing fields
         response = self.client.post("/fiscal-code/encode", json={"lastname": "Test"})
         assert response.status_code == 422  # Validation error
 
+        # Test oversized names are rejected before encoding
+        response = self.client.post("/fiscal-code/encode", json={
+            "lastname": "A" * 1000,
+            "firstname": "Fabio",
+            "gender": "M",
+            "birthdate": "03/04/1985",
+            "birthplace": "Torino",
+        })
+        assert response.status_code == 422  # Validation error
+
     def test_api_response_structure(self):
         """Test that API responses have correct structure."""
-        from codicefiscale import partitaiva
-        valid_vat = partitaiva.encode("0123456789")
 
         response = self.client.post(
             "/vat/validate",
-            json={"partita_iva": valid_vat}
+            json={"partita_iva": VALID_VAT}
         )
         assert response.status_code == 200
         data = response.json()
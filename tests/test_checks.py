@@ -25,6 +25,8 @@ def valid_fiscal_code_test_cases():
         ("CCC-FBA-85-D03-L219-P", True),
         ("CCCFBA85D03L219PP", False),  # too long
         ("CCCFBA85D03L219B", False),  # wrong CIN
+        ("cccfba85d03l219p", True),
+        ("cccfba85d03l219b", False),  # wrong CIN
         ("CCCFBA85D03L219", False),  # too short
         ("CCCFBA85D00L219", False),  # wrong birthdate day
         ("CCCFBA85D99L219", False),  # wrong birthdate day
@@ -45,3 +47,11 @@ def test_is_valid(valid_fiscal_code_test_cases):
     """
     for fiscal_code, expected_result in valid_fiscal_code_test_cases:
         assert codicefiscale.is_valid(fiscal_code) == expected_result
+
+
+def test_is_valid_non_ascii_digits():
+    """
+    Test the `is_valid` function with non-ASCII digits, that must not raise.
+    """
+    for fiscal_code in ("CCCFBA\u0668\u0665D03L219P", "CCCFBA\u0668\u0665D03L219B"):
+        assert isinstance(codicefiscale.is_valid(fiscal_code), bool)
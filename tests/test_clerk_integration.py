@@ -1,16 +1,29 @@
 #!/usr/bin/env python3
 """Test script to help with Clerk authentication integration."""
 
+import asyncio
 import os
 import json
 import base64
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import time
+from typing import Any
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
+
+def _b64(obj: dict[str, Any]) -> str:
+    """Serialize to JSON and base64url-encode it without padding, as in a JWT."""
+    data = orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
 def create_mock_jwt_token() -> str:
     """Create a mock JWT token for testing (DO NOT use in production)."""
     
@@ -23,96 +36,89 @@ def create_mock_jwt_token() -> str:
     # JWT Payload
     instance_id = os.getenv("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY", "").split("_")[2] if os.getenv("NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY") else ""
     
+    now = int(time.time())
     payload = {
         "sub": "user_test123456",  # User ID
         "iss": f"https://{instance_id}.clerk.accounts.dev" if instance_id else "https://test.clerk.accounts.dev",
         "aud": "test",
-        "exp": int((datetime.now() + timedelta(hours=1)).timestamp()),
-        "iat": int(datetime.now().timestamp()),
+        "exp": now + 3600,
+        "iat": now,
         "email": "test@example.com",
         "name": "Test User",
         "given_name": "Test",
         "family_name": "User"
     }
     
-    # Base64 encode (without signature - FOR TESTING ONLY)
-    header_b64 = base64.urlsafe_b64encode(json.dumps(header).encode()).decode().rstrip('=')
-    payload_b64 = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
-    
     # Create mock signature (DO NOT use in production)
     signature = "mock_signature_for_testing_only"
     
-    return f"{header_b64}.{payload_b64}.{signature}"
+    # Base64 encode (without signature - FOR TESTING ONLY)
+    return f"{_b64(header)}.{_b64(payload)}.{signature}"
 
-def test_api_endpoints():
-    """Test API endpoints with different authentication scenarios."""
-    import subprocess
-    
-    base_url = "http://localhost:8000"
+def probe_api_endpoints():
+    """Probe API endpoints with different authentication scenarios."""
+    asyncio.run(_probe_api_endpoints())
+
+
+async def _probe_api_endpoints():
+    import httpx
+
+    from codicefiscale.app import app
     
     print("🔗 Testing API Endpoints")
     print("=" * 50)
     
+    # The requests go straight to the app (no server, no curl), all at once
+    body = {"code": "CCCFBA85D03L219P"}
+    mock_token = create_mock_jwt_token()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        health, root, no_token, invalid_token, with_mock_token = await asyncio.gather(
+            client.get("/health"),
+            client.get("/"),
+            client.post("/fiscal-code/validate", json=body),
+            client.post(
+                "/fiscal-code/validate",
+                json=body,
+                headers={"Authorization": "Bearer invalid_token"},
+            ),
+            client.post(
+                "/fiscal-code/validate",
+                json=body,
+                headers={"Authorization": f"Bearer {mock_token}"},
+            ),
+        )
+    
     # Test 1: Health endpoint (should always work)
     print("1. Testing health endpoint...")
-    result = subprocess.run([
-        "curl", "-s", f"{base_url}/health"
-    ], capture_output=True, text=True)
-    print(f"   Status: {'✅ OK' if 'healthy' in result.stdout else '❌ Error'}")
+    print(f"   Status: {'✅ OK' if 'healthy' in health.text else '❌ Error'}")
     
     # Test 2: Root endpoint without auth
     print("2. Testing root endpoint...")
-    result = subprocess.run([
-        "curl", "-s", f"{base_url}/"
-    ], capture_output=True, text=True)
-    print(f"   Status: {'✅ OK' if result.returncode == 0 else '❌ Error'}")
+    print(f"   Status: {'✅ OK' if root.status_code == 200 else '❌ Error'}")
     
     # Test 3: Protected endpoint without token
     print("3. Testing protected endpoint without token...")
-    result = subprocess.run([
-        "curl", "-s", "-X", "POST", f"{base_url}/fiscal-code/validate",
-        "-H", "Content-Type: application/json",
-        "-d", '{"code": "CCCFBA85D03L219P"}'
-    ], capture_output=True, text=True)
-    
-    if "Not authenticated" in result.stdout:
+    if "Not authenticated" in no_token.text:
         print("   Status: ✅ Correctly protected")
     else:
-        print(f"   Status: ❌ Unexpected response: {result.stdout[:100]}")
+        print(f"   Status: ❌ Unexpected response: {no_token.text[:100]}")
     
     # Test 4: Protected endpoint with invalid token
     print("4. Testing protected endpoint with invalid token...")
-    result = subprocess.run([
-        "curl", "-s", "-X", "POST", f"{base_url}/fiscal-code/validate",
-        "-H", "Content-Type: application/json",
-        "-H", "Authorization: Bearer invalid_token",
-        "-d", '{"code": "CCCFBA85D03L219P"}'
-    ], capture_output=True, text=True)
-    
-    if "Not enough segments" in result.stdout:
+    if "Not enough segments" in invalid_token.text:
         print("   Status: ✅ Correctly rejects invalid token (this is the error you saw)")
     else:
-        print(f"   Status: ❌ Unexpected response: {result.stdout[:100]}")
-    
-    # Test 5: Protected endpoint with mock token (for testing only)
-    print("5. Testing protected endpoint with mock token...")
-    mock_token = create_mock_jwt_token()
-    
-    result = subprocess.run([
-        "curl", "-s", "-X", "POST", f"{base_url}/fiscal-code/validate",
-        "-H", "Content-Type: application/json",
-        "-H", f"Authorization: Bearer {mock_token}",
-        "-d", '{"code": "CCCFBA85D03L219P"}'
-    ], capture_output=True, text=True)
-    
-    try:
-        response = json.loads(result.stdout)
-        if "valid" in response:
-            print("   Status: ✅ Successfully authenticated with mock token")
-        else:
-            print(f"   Status: ❌ Unexpected response: {response}")
-    except json.JSONDecodeError:
-        print(f"   Status: ❌ Invalid JSON response: {result.stdout[:100]}")
+        print(f"   Status: ❌ Unexpected response: {invalid_token.text[:100]}")
+    
+    # Test 5: Protected endpoint with unsigned mock token (signature is verified)
+    print("5. Testing protected endpoint with unsigned mock token...")
+    if with_mock_token.status_code == 401:
+        print("   Status: ✅ Correctly rejects unsigned mock token")
+    elif with_mock_token.status_code == 200:
+        print("   Status: ⚠️ Accepted - authentication is disabled")
+    else:
+        print(f"   Status: ❌ Unexpected response: {with_mock_token.text[:100]}")
 
 def get_clerk_setup_instructions():
     """Provide instructions for getting a real Clerk JWT token."""
@@ -174,7 +180,6 @@ def get_clerk_setup_instructions():
     
     print("💡 For development/testing, you can also:")
     print("   - Disable authentication by removing the CLERK_* env vars")
-    print("   - Use the mock token generated by this script (NOT for production)")
 
 if __name__ == "__main__":
     print("🔐 Clerk Integration Test Tool")
@@ -189,7 +194,7 @@ if __name__ == "__main__":
     print("")
     
     # Test API endpoints
-    test_api_endpoints()
+    probe_api_endpoints()
     
     # Provide setup instructions
     get_clerk_setup_instructions()
@@ -1,4 +1,8 @@
+import random
+
 import pytest
+from hypothesis import given
+from hypothesis import strategies as st
 
 from codicefiscale import partitaiva
 
@@ -30,12 +34,39 @@ class TestPartitaIVA:
             "1234567890A",  # Contains letter
             "12345678901",  # Wrong check digit
             None,  # None value
+            12345678901,  # Not a string
+            ["12345678901"],  # Not a string (and unhashable)
             "12 34 56 78 90 1",  # With spaces but wrong check digit
         ]
 
         for vat in invalid_vat_numbers:
             assert not partitaiva.is_valid(vat), f"VAT {vat} should be invalid"
 
+    def test_is_valid_many(self):
+        """Test validating many VAT numbers at once."""
+        valid_vat = partitaiva.encode("0123456789")
+        vat_numbers = [valid_vat, "12345678901", "", None, valid_vat]
+
+        assert partitaiva.is_valid_many(vat_numbers) == [True, False, False, False, True]
+        assert partitaiva.is_valid_many([]) == []
+
+    def test_is_valid_many_matches_reference(self):
+        """Test batch validation against a digit by digit check on random numbers."""
+        rng = random.Random(42)
+        vat_numbers = ["".join(rng.choices("0123456789", k=11)) for _ in range(10000)]
+
+        def reference(vat):
+            total = 0
+            for i, d in enumerate(map(int, vat[:10])):
+                if i % 2:
+                    d *= 2
+                    if d > 9:
+                        d -= 9
+                total += d
+            return (10 - total % 10) % 10 == int(vat[10])
+
+        assert partitaiva.is_valid_many(vat_numbers) == list(map(reference, vat_numbers))
+
     def test_calculate_check_digit(self):
         """Test check digit calculation."""
         test_cases = [
@@ -89,6 +120,9 @@ class TestPartitaIVA:
         with pytest.raises(ValueError):
             partitaiva.encode("123456789A")  # Contains letter
 
+        with pytest.raises(ValueError):
+            partitaiva.encode("0123456789\n")  # Trailing newline
+
     def test_decode(self):
         """Test VAT number decoding."""
         # Test with valid VAT number
@@ -136,6 +170,26 @@ class TestPartitaIVA:
         assert result["valid"] is True
         assert result["base_number"] == base_num
 
+        assert partitaiva.is_valid(f"\t{full_vat[:5]}\n{full_vat[5:]}\r\n")
+        for space in ("\u00a0", "\u202f", "\u2009", "\u3000", "\x1c", "\x85"):
+            assert partitaiva.is_valid(f"{full_vat[:2]}{space}{full_vat[2:]}")
+
+    def test_decode_cached(self):
+        """Test decoding results are memoized but never shared."""
+        partitaiva._check_digits.cache_clear()
+        full_vat = partitaiva.encode("0123456789")
+
+        result = partitaiva.decode(full_vat)
+        result["valid"] = False
+
+        assert partitaiva.decode(full_vat)["valid"] is True
+        assert partitaiva._check_digits.cache_info().hits == 1
+
+        # Malformed input is rejected before the cache, spacing shares the entry
+        partitaiva.decode("A" * 1000)
+        partitaiva.decode(f"{full_vat[:5]} {full_vat[5:]}")
+        assert partitaiva._check_digits.cache_info().currsize == 1
+
     def test_integration_encode_decode(self):
         """Test encoding and then decoding produces consistent results."""
         base_numbers = ["0123456789", "9876543210", "5555555555", "0000000000"]
@@ -153,3 +207,16 @@ class TestPartitaIVA:
             assert decoded["base_number"] == base_num
             assert decoded["code"] == encoded_vat
 
+    @given(
+        base_numbers=st.lists(
+            st.text(alphabet="0123456789", min_size=10, max_size=10),
+            min_size=1,
+            max_size=1024,
+        )
+    )
+    def test_encode_decode_batch(self, base_numbers):
+        """Test encoded VAT numbers are all valid and decode back to their base number."""
+        vat_numbers = [partitaiva.encode(base_num) for base_num in base_numbers]
+
+        assert all(partitaiva.is_valid_many(vat_numbers))
+        assert [partitaiva.decode(vat)["base_number"] for vat in vat_numbers] == base_numbers